@@ -1,36 +1,94 @@
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QLabel, QLineEdit, QPushButton,
-    QFileDialog, QVBoxLayout, QTextEdit
+    QWidget, QLabel, QLineEdit, QPushButton,
+    QFileDialog, QVBoxLayout, QPlainTextEdit
 )
-from PyQt6.QtCore import Qt
-import re
-import sys
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+import csv
+import errno
 import os
 import shutil
-import csv
 from datetime import datetime
 
 
+# таблица недопустимых символов для имени каталога (str.translate работает в один проход на C)
+_BAD_CHARS_TABLE = str.maketrans('', '', '\\/:*?"<>|+%!@')
+
+# стили как константы модуля — строка не пересоздаётся/не перепарсивается на каждый экземпляр
+_DROP_CSS = """
+    QLabel {
+        border: 2px dashed #aaa;
+        padding: 30px;
+        background: #f9f9f9;
+    }
+"""
+_CONSOLE_CSS = """
+    QPlainTextEdit {
+        background: #e6e6e6;
+        color: #222;
+        font-family: Consolas, monospace;
+        font-size: 12px;
+    }
+"""
+
+
 """
 Окно для более удобного создания каталогов с договорами. Имя каталога содержит данные, используемые поисковым сккриптом
 Так же создаёт в новых каталогах файл .csv, содержаний инфу, которая была указана в полях окна
 """
 
 
+class CopyWorkerSignals(QObject):
+    finished = pyqtSignal(int, str)  # количество скопированных файлов, имя каталога
+    error = pyqtSignal(str)  # текст ошибки копирования одного файла
+
+
+class CopyWorker(QRunnable):
+    """
+    Копирует файлы в целевой каталог в фоновом потоке, чтобы не блокировать GUI.
+    shutil.copyfile (а не copy) идёт по быстрому пути ядра (sendfile/fcopyfile/CopyFile2)
+    без лишнего stat+chmod на каждый файл.
+    """
+
+    def __init__(self, files, target_folder):
+        super().__init__()
+        self.files = list(files)
+        self.target_folder = target_folder
+        self.signals = CopyWorkerSignals()
+
+    @staticmethod
+    def _copy(src, dst):
+        # в пределах одной файловой системы hardlink — одна операция над inode,
+        # ни одного байта данных не копируется; иначе обычный copyfile (sendfile)
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EEXIST):
+                shutil.copyfile(src, dst)
+            else:
+                raise
+
+    def run(self):
+        # ошибка по одному файлу не должна молча обрывать весь поток:
+        # сообщаем о ней в GUI и продолжаем с остальными файлами
+        copied = 0
+        for src in self.files:
+            dst = os.path.join(self.target_folder, os.path.basename(src))
+            try:
+                self._copy(src, dst)
+                copied += 1
+            except OSError as e:
+                self.signals.error.emit(f"Ошибка копирования {os.path.basename(src)}: {e}")
+        self.signals.finished.emit(copied, os.path.basename(self.target_folder))
+
+
 class DropArea(QLabel):
     def __init__(self):
         super().__init__("Перетащите файлы сюда")
         self.setAcceptDrops(True)
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setMinimumHeight(160)  # Увеличение высоты в 2 раза
-        self.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #aaa;
-                padding: 30px;
-                background: #f9f9f9;
-            }
-        """)
-        self.files = []
+        self.setStyleSheet(_DROP_CSS)
+        self.files: set[str] = set()  # set: повторное перетаскивание того же файла не даёт дубликата
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
@@ -40,7 +98,7 @@ class DropArea(QLabel):
         for url in event.mimeData().urls():
             path = url.toLocalFile()
             if os.path.isfile(path):
-                self.files.append(path)
+                self.files.add(path)
 
         self.setText(f"Файлов добавлено: {len(self.files)}")
 
@@ -98,17 +156,11 @@ class MainWindow(QWidget):
         layout.addWidget(self.create_btn)
 
         # Консоль (уменьшена)
-        self.console = QTextEdit()
+        self.console = QPlainTextEdit()
         self.console.setReadOnly(True)
         self.console.setFixedHeight(120)  # В 2 раза меньше
-        self.console.setStyleSheet("""
-            QTextEdit {
-                background: #e6e6e6;
-                color: #222;
-                font-family: Consolas, monospace;
-                font-size: 12px;
-            }
-        """)
+        self.console.setMaximumBlockCount(500)  # старые строки вытесняются, append остаётся O(1)
+        self.console.setStyleSheet(_CONSOLE_CSS)
         self.console.setPlaceholderText("История операций...")
         layout.addWidget(self.console)
 
@@ -116,7 +168,7 @@ class MainWindow(QWidget):
 
     def log(self, message):
         time = datetime.now().strftime("%H:%M:%S")
-        self.console.append(f"[{time}] {message}")
+        self.console.appendPlainText(f"[{time}] {message}")
 
     def choose_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Выберите папку")
@@ -127,8 +179,7 @@ class MainWindow(QWidget):
 
     @staticmethod
     def sanitize_filename(string):
-        cleaned = re.sub(r'[\\/:*?"<>|+%!@]', '', string)
-        return cleaned
+        return string.translate(_BAD_CHARS_TABLE)
 
     def create_result(self):
         """
@@ -147,9 +198,10 @@ class MainWindow(QWidget):
             self.margin_input.text().replace('\\', ' ').strip()
         ]
 
-        filled_fields = [self.sanitize_filename(f) for f in fields if f]
+        # сначала склеиваем заполненные поля, затем одна очистка по всей строке
+        raw_name = "_".join(f for f in fields if f)
 
-        if not filled_fields:
+        if not raw_name:
             self.log("❗ Не заполнено ни одного поля")
             return
 
@@ -157,21 +209,28 @@ class MainWindow(QWidget):
             self.log("❗ Не добавлены файлы")
             return
 
-        folder_name = "_".join(filled_fields)
+        folder_name = self.sanitize_filename(raw_name)
         target_folder = os.path.join(self.output_dir, folder_name)
 
         os.makedirs(target_folder, exist_ok=True)
 
-        for file_path in self.drop_area.files:
-            shutil.copy(file_path, target_folder)
+        # копирование файлов уходит в фоновый поток, GUI не блокируется
+        worker = CopyWorker(self.drop_area.files, target_folder)
+        worker.signals.finished.connect(
+            lambda count, name: self.log(f"Скопировано файлов: {count} в каталог {name}")
+        )
+        worker.signals.error.connect(lambda msg: self.log(f"❗ {msg}"))
+        QThreadPool.globalInstance().start(worker)
 
         csv_path = os.path.join(target_folder, "info.csv")
-        with open(csv_path, "w", newline="",  encoding="utf-8") as f:
+        # одна буферизированная запись обеих строк; csv.writer оставлен намеренно —
+        # он экранирует ';', кавычки и переводы строк внутри полей
+        with open(csv_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
             writer = csv.writer(f, delimiter=';')
-            writer.writerow([
-                "Номер договора", "Адрес", "Телефон", "ФИО клиента", "Маржа"
+            writer.writerows([
+                ["Номер договора", "Адрес", "Телефон", "ФИО клиента", "Маржа"],
+                fields,
             ])
-            writer.writerow(fields)
 
         self.log(f"Создан новый каталог: {folder_name}")
         self.clear_form()
@@ -188,6 +247,10 @@ class MainWindow(QWidget):
 
 
 if __name__ == "__main__":
+    # нужны только при запуске как приложения — не грузим при импорте модуля
+    import sys
+    from PyQt6.QtWidgets import QApplication
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -1,7 +1,4 @@
-from sqlalchemy import create_engine
 import sqlite3
-from sqlalchemy.orm import sessionmaker
-from database.scheme import Base, User
 import os
 
 
@@ -9,82 +6,113 @@ import os
 This module contains two classes for managing Telegram user information.
 The Database class performs CRUD operations on an SQLite database file. It inherits from the DBCache class.
 The DBCache class maintains an in-memory cache of data from the database.
-At the end of the module, an instance is created. 
+At the end of the module, an instance is created.
 This single instance is used for all interactions with both the database and its cache.
 """
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'users_db.db')}"
+DATABASE_PATH = os.path.join(BASE_DIR, 'users_db.db')
 
 
 class DBCash:
     cash = {}  # key: user_tg_id (int), value: flag (int)
+    banned_ids = set()  # mirror of the ids with flag 2 — one membership probe on the middleware path
+    logged_in_ids = set()  # same mirror for flag 1: the "is authorized" test is one probe
+    CASH_MAX_SIZE = 100_000  # bounds memory if the user count ever grows this far
 
     def _add_to_cash(self, user_tg_id, flag):
+        if len(self.cash) >= self.CASH_MAX_SIZE:
+            # dicts iterate in insertion order, so this evicts the oldest entry;
+            # an evicted user is re-fetched from the database on next contact
+            self.cash.pop(next(iter(self.cash)))
         self.cash[user_tg_id] = flag
+        if flag == 2:
+            self.banned_ids.add(user_tg_id)
+            self.logged_in_ids.discard(user_tg_id)
+        else:
+            self.banned_ids.discard(user_tg_id)
+            if flag == 1:
+                self.logged_in_ids.add(user_tg_id)
 
     def _del_from_cash(self, user_tg_id):
-        if self.cash.get(user_tg_id):
-            del self.cash[user_tg_id]
+        # pop is one hash lookup and, unlike a truthiness check, works for any flag value
+        self.cash.pop(user_tg_id, None)
+        self.banned_ids.discard(user_tg_id)
+        self.logged_in_ids.discard(user_tg_id)
 
 
 class Database(DBCash):
-    def __init__(self, db_url: str = DATABASE_URL):
-        database_path = os.path.join(BASE_DIR, 'users_db.db')
-        if not os.path.exists(database_path):
-            conn = sqlite3.connect(database_path)
-            conn.close()
-
-        self.engine = create_engine(
-            db_url,
-            echo=False,
-            connect_args={"check_same_thread": False}  # важно для SQLite + Telegram
-        )
-        self.session = sessionmaker(
-            bind=self.engine,
-            autocommit=False,
-            autoflush=False
-        )
+    """
+    Plain sqlite3 instead of SQLAlchemy: the schema is one two-column table, so
+    the ORM machinery (session, unit of work, identity map) costs more than the
+    queries it dispatches. sqlite3 reuses compiled statements through its
+    internal statement cache, so each call below is a prepared-statement execute.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        # sqlite3.connect creates a missing database file itself — no pre-create needed.
+        # isolation_level=None — autocommit; check_same_thread=False важно для SQLite + Telegram
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # WAL lets readers proceed alongside the writer; NORMAL sync is safe with WAL
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache, negative = KiB
+        self.conn.execute("PRAGMA foreign_keys=ON")
         self.__create_table()
-        self.cash = {item.user_tg_id: item.flag for item in self.__select_all()}
+        self.cash = dict(self.conn.execute("SELECT user_tg_id, flag FROM users"))
+        self.banned_ids = {user_tg_id for user_tg_id, flag in self.cash.items() if flag == 2}
+        self.logged_in_ids = {user_tg_id for user_tg_id, flag in self.cash.items() if flag == 1}
 
     def __create_table(self):
-        Base.metadata.create_all(bind=self.engine)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_tg_id INTEGER, "
+            "flag INTEGER)"
+        )
+        # collapse duplicates left by earlier versions without the index, then make
+        # user_tg_id unique so INSERT OR IGNORE actually ignores repeats
+        self.conn.execute(
+            "DELETE FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY user_tg_id)"
+        )
+        self.conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_user_tg_id ON users (user_tg_id)"
+        )
 
-    def __select_all(self):
-        """Get all from a database table"""
-        with self.session() as s:
-            return s.query(User).all()
+    def get_flag(self, user_tg_id) -> int | None:
+        """Flag lookup backed by the cache; on a miss, fall back to one indexed SELECT."""
+        flag = self.cash.get(user_tg_id)
+        if flag is not None:
+            return flag
+        row = self.conn.execute(
+            "SELECT flag FROM users WHERE user_tg_id = ? LIMIT 1", (user_tg_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._add_to_cash(user_tg_id, row[0])
+        return row[0]
 
     def insert(self, user_tg_id, flag) -> None:
         """
         Add new USER to database table and DBCash.cash. The <flag> argument indicates whether the user is banned
         or has read/write access.
         """
-        if self.cash.get(user_tg_id):
+        # guard on the mirror sets, not on cash: the bounded cash may have evicted
+        # a user who still has a row, and the sets are complete
+        if user_tg_id in self.logged_in_ids or user_tg_id in self.banned_ids:
             return
-        with self.session() as s:
-            new_user = User(
-                user_tg_id=user_tg_id,
-                flag=flag
-            )
-            s.add(new_user)
-            s.commit()
+        self.conn.execute("INSERT OR IGNORE INTO users (user_tg_id, flag) VALUES (?, ?)", (user_tg_id, flag))
         self._add_to_cash(user_tg_id, flag)
 
     def delete(self, user_tg_id):
         """Remove user from database table and DBCash.cash"""
-        if not self.cash.get(user_tg_id):
+        if user_tg_id not in self.logged_in_ids and user_tg_id not in self.banned_ids:
             return
-        with self.session() as s:
-            user = s.query(User).filter(User.user_tg_id == user_tg_id).first()
-            if user:
-                s.delete(user)
-                s.commit()
-
+        self.conn.execute("DELETE FROM users WHERE user_tg_id = ?", (user_tg_id,))
         self._del_from_cash(user_tg_id)
 
 
 users_database = Database()
-
@@ -1,12 +1,19 @@
 from __future__ import annotations
 import os
+import select
 import time
 import signal  # Module for handling system signals
-from typing import Optional, Set, Iterable
+from typing import Optional, Set
 import multiprocessing
-import queue as _queue_exc  # for handling queue.Full if needed
 from config import config_
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog not installed -> polling fallback only
+    Observer = None
+    FileSystemEventHandler = object
+
 
 """
 Function `<run_watcher>` is designed to run in a separate process
@@ -14,11 +21,19 @@ Function `<run_watcher>` is designed to run in a separate process
 a queue object (multiprocessing.Queue) once during process initialization.
 
 When immediate child folders appear/are deleted in the specified directory,
-a dictionary is placed in the queue:
- - {"event": "new", "folder_name": "<folder_name>"}
- - {"event": "del", "folder_name": "<folder_name>"}
+a dictionary with the batch of changes is placed in the queue:
+ - {"events": [{"event": "new", "folder_name": "<folder_name>"},
+               {"event": "del", "folder_name": "<folder_name>"}, ...]}
+
+All changes detected at the same moment (one polling tick / one rename) go
+into a single payload, so bulk churn costs one pickle + one pipe write
+instead of one per folder.
 
-Reaction is based on simple polling (we check the directory at regular intervals).
+The primary implementation is event-driven (watchdog: inotify on Linux,
+ReadDirectoryChangesW on Windows, FSEvents on macOS) — the process sleeps
+until the kernel reports an actual mutation. If watchdog is unavailable or
+cannot watch the path (typical for network mounts), we fall back to simple
+polling of the directory at regular intervals.
 """
 
 
@@ -28,213 +43,265 @@ STORAGE_PATH = config_.STORAGE_DIR
 # Global flag for termination signal
 _terminate_requested = False
 
+# How long an observed directory mtime must lie in the past before the polling
+# loop may trust it to short-circuit a rescan. Covers coarse filesystem
+# timestamps (FAT: 2 s; NFS servers often truncate to whole seconds).
+_MTIME_SETTLE_NS = 2_000_000_000
+
 
 def _handle_terminate(signum, frame) -> None:  # pragma: no cover - simple signal wrapper
-    # Access global termination flag
     global _terminate_requested
-    # Set termination flag to True
     _terminate_requested = True
 
 
-def _list_child_folders(path: str, include_hidden: bool) -> Set[str]:
-    # Create empty set for folder names
-    names: Set[str] = set()
+def _dir_mtime_ns(path: str) -> Optional[int]:
+    # None means "unknown" — the caller must rescan in that case
+    try:
+        return os.stat(path, follow_symlinks=False).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _list_child_folders(path: bytes, include_hidden: bool) -> Set[bytes]:
+    # Names are kept as the raw bytes os.scandir returns for a bytes path:
+    # cheaper to hash/compare in the per-tick set diff, decoded only on emission.
+    names: Set[bytes] = set()
     try:
-        # Open directory for scanning
         with os.scandir(path) as it:
-            # Iterate through all directory entries
             for entry in it:
                 try:
-                    # Check if entry is a directory (not following symlinks)
                     if not entry.is_dir(follow_symlinks=False):
-                        # Skip if not a directory
                         continue
                 except OSError:
                     # Entry might disappear during check
-                    # Skip this entry
                     continue
-                # Get entry name
                 name = entry.name
-                # Check if hidden file (starts with '.') and include_hidden is False
-                if not include_hidden and name.startswith("."):
-                    # Skip hidden files
+                if not include_hidden and name.startswith(b"."):
                     continue
-                # Add name to set
                 names.add(name)
     except (PermissionError, FileNotFoundError):
         # If no access or directory deleted - return empty set
         return set()
-    # Return set of folder names
     return names
 
 
 def _safe_put(out_queue, payload: dict) -> None:
     """
-    Put item in queue without blocking the calling process forever and without crashing on errors.
-    If queue is full or closed, the event is skipped.
+    Put item in queue without crashing the watcher on errors.
+    SimpleQueue.put takes no block/timeout arguments and never fills up.
     """
     try:
-        # Try non-blocking put. multiprocessing.Queue.put(block=False) works.
-        out_queue.put(payload, block=False)
-    except TypeError:
-        # Some queues (or old implementations) might not support block kwarg.
-        try:
-            # Try regular blocking put
-            out_queue.put(payload)
-        except Exception:
-            # Ignore any exception
-            pass
-    except (BrokenPipeError, EOFError, _queue_exc.Full, OSError):
-        # Queue closed, receiver process finished, or queue full
-        # Ignore and continue
-        pass
-    except Exception:
-        # Any other error - ignore to not interrupt watcher
+        out_queue.put(payload)
+    except (BrokenPipeError, EOFError, OSError):
+        # Queue closed or receiver process finished - skip the event
         pass
 
 
-def run_watcher(
-    out_queue,
-    poll_interval: float = 1.0,
-    include_hidden: bool = False,
-    stop_event: Optional[multiprocessing.synchronize.Event] = None,
-) -> None:
-    """
-    Start blocking watcher in current process.
+class _StorageEventHandler(FileSystemEventHandler):
+    """Translates kernel file-system events on STORAGE_PATH children into queue payloads."""
 
-    Parameters:
-      path: path to directory (string). Should exist and be a directory.
-      out_queue: queue object (usually multiprocessing.Queue) where event
-                 dictionaries will be placed.
-      poll_interval: polling interval in seconds (float, >= 0.1 recommended).
-      include_hidden: if False, ignore names starting with '.'.
-      stop_event: (optional) multiprocessing.Event - if provided, will be checked
-                  for is_set() for proper stop from another process.
+    def __init__(self, out_queue, include_hidden: bool):
+        self._queue = out_queue
+        self._include_hidden = include_hidden
 
-    Behavior:
-      - Function blocks current process and runs until:
-          * stop_event is set (if provided), or
-          * SIGTERM/SIGINT signal is sent to process, or
-          * process is forcibly terminated.
-      - At start, previous folder set is set to current directory state,
-        so no initial events are generated for already existing folders.
+    def _event(self, event_name: str, path: str) -> Optional[dict]:
+        folder_name = os.path.basename(path.rstrip(os.sep))
+        if not self._include_hidden and folder_name.startswith("."):
+            return None
+        return {"event": event_name, "folder_name": folder_name}
+
+    def _emit(self, *events: Optional[dict]) -> None:
+        batch = [e for e in events if e is not None]
+        if batch:
+            _safe_put(self._queue, {"events": batch})
+
+    def on_created(self, event) -> None:
+        if event.is_directory:
+            self._emit(self._event("new", event.src_path))
+
+    def on_deleted(self, event) -> None:
+        if event.is_directory:
+            self._emit(self._event("del", event.src_path))
+
+    def on_moved(self, event) -> None:
+        # rename of a child folder = deletion of the old name + appearance of the new one,
+        # delivered as one batch
+        if event.is_directory:
+            self._emit(self._event("del", event.src_path), self._event("new", event.dest_path))
+
+
+def _run_event_watcher(out_queue, include_hidden: bool, stop_event) -> bool:
     """
-    # Access global termination flag
-    global _terminate_requested
+    Event-driven watcher on top of watchdog.Observer. Returns True if the observer
+    was started (and has since been stopped), False if it could not start — the
+    caller then falls back to polling.
+    """
+    if Observer is None:
+        return False
 
-    # Check if storage path exists
-    if not os.path.exists(STORAGE_PATH):
-        # Raise error if path not found
-        raise FileNotFoundError(f"Path not found: {STORAGE_PATH}")
+    observer = Observer()
+    try:
+        observer.schedule(_StorageEventHandler(out_queue, include_hidden), STORAGE_PATH, recursive=False)
+        observer.start()
+    except OSError:
+        # e.g. inotify not supported on this mount
+        return False
 
-    # Set signal handlers for clean termination on SIGTERM/SIGINT.
-    # This is safe: we override signal only in watcher process.
-    # Set handler for SIGTERM signal
-    signal.signal(signal.SIGTERM, _handle_terminate)
     try:
-        # Try to set handler for SIGINT signal
-        signal.signal(signal.SIGINT, _handle_terminate)
-    except Exception:
-        # On some platforms (Windows) there might be SIGINT handling restrictions
-        # Continue without SIGINT handler
-        pass
+        while not _terminate_requested:
+            if stop_event is not None:
+                try:
+                    if stop_event.wait(timeout=0.5):
+                        break
+                except Exception:
+                    time.sleep(0.5)
+            else:
+                time.sleep(0.5)
+    finally:
+        observer.stop()
+        observer.join()
+    return True
 
-    # Initial state: existing folders are not considered "new".
-    # Get current list of child folders
-    previous: Set[str] = _list_child_folders(STORAGE_PATH, include_hidden)
 
+def _run_polling_watcher(out_queue, poll_interval: float, include_hidden: bool, stop_event) -> None:
+    """Fallback: poll the directory and diff the set of child folder names each tick."""
     # Small lower bound for poll_interval for proper reaction and CPU saving.
-    # Check if poll_interval is negative
     if poll_interval < 0:
-        # Set to zero if negative
         poll_interval = 0.0
 
-    # Main polling loop
+    # Without a stop_event we sleep in select() on a wakeup pipe: SIGTERM/SIGINT
+    # writes a byte into it and the sleep returns immediately, instead of the
+    # loop waking 10x/second just to poll the termination flag.
+    wakeup_r = wakeup_w = None
+    if stop_event is None:
+        try:
+            wakeup_r, wakeup_w = os.pipe()
+            os.set_blocking(wakeup_w, False)
+            signal.set_wakeup_fd(wakeup_w)
+        except (OSError, ValueError):
+            # ValueError: not in the main thread - keep the plain sleep
+            wakeup_r = wakeup_w = None
+
+    try:
+        _polling_loop(out_queue, poll_interval, include_hidden, stop_event, wakeup_r)
+    finally:
+        if wakeup_w is not None:
+            signal.set_wakeup_fd(-1)
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+
+    return
+
+
+def _polling_loop(out_queue, poll_interval, include_hidden, stop_event, wakeup_r) -> None:
+    # Initial state: existing folders are not considered "new".
+    storage_path = os.fsencode(STORAGE_PATH)
+    previous: Set[bytes] = _list_child_folders(storage_path, include_hidden)
+    last_mtime_ns = _dir_mtime_ns(STORAGE_PATH)
+
     while True:
         # Check external stop event (multiprocessing.Event supports is_set()).
-        # Check if stop_event is provided
         if stop_event is not None:
             try:
-                # Check if event is set
                 if stop_event.is_set():
-                    # Break loop if event is set
                     break
             except Exception:
                 # If event is wrong type or invalid - ignore
                 pass
 
         # Check termination flag from signal
-        # Check if termination requested
         if _terminate_requested:
-            # Break loop if termination requested
             break
 
-        # Get current list of folders
-        current = _list_child_folders(STORAGE_PATH, include_hidden)
-        # Find newly added folders (in current but not in previous)
-        added = current - previous
-        # Find removed folders (in previous but not in current)
-        removed = previous - current
-
-        # Generate events (sort for deterministic order)
-        # Process added folders
-        for name in sorted(added):
-            # Create payload dictionary
-            payload = {"event": "new", "folder_name": name}
-            # Put payload in queue
-            _safe_put(out_queue, payload)
-
-        # Process removed folders
-        for name in sorted(removed):
-            # Create payload dictionary
-            payload = {"event": "del", "folder_name": name}
-            # Put payload in queue
-            _safe_put(out_queue, payload)
-
-        # Update previous state to current
-        previous = current
+        # On POSIX the directory mtime bumps on child add/remove, so one stat
+        # replaces the full scandir pass on the (common) unchanged tick.
+        # The short-circuit is unsafe while the mtime is fresh: a change landing
+        # within the same timestamp granule (seconds-wide on coarse network
+        # mounts) never bumps it again, so keep rescanning until the observed
+        # mtime is comfortably in the past.
+        mtime_ns = _dir_mtime_ns(STORAGE_PATH)
+        recent = mtime_ns is not None and time.time_ns() - mtime_ns < _MTIME_SETTLE_NS
+        if mtime_ns is None or recent or mtime_ns != last_mtime_ns:
+            current = _list_child_folders(storage_path, include_hidden)
+            added = current - previous
+            removed = previous - current
+
+            # Generate events; the whole tick goes out as one payload.
+            # Set iteration order is fine here - the consumer does not depend on ordering.
+            events = [{"event": "new", "folder_name": os.fsdecode(name)} for name in added]
+            events += [{"event": "del", "folder_name": os.fsdecode(name)} for name in removed]
+            if events:
+                _safe_put(out_queue, {"events": events})
+
+            previous = current
+            last_mtime_ns = mtime_ns
 
         # Waiting: if stop_event provided, can wait via its wait() (faster response).
-        # Check if stop_event exists and has wait method
         if stop_event is not None and hasattr(stop_event, "wait"):
             try:
                 # wait returns True if event is set - then break loop
-                # Wait with timeout
-                signaled = stop_event.wait(timeout=poll_interval)
-                # Check if event was signaled
-                if signaled:
-                    # Break loop if signaled
+                if stop_event.wait(timeout=poll_interval):
                     break
             except Exception:
                 # If wait not available or caused error - fallback to time.sleep
-                # Sleep for poll interval
                 time.sleep(poll_interval)
+        elif wakeup_r is not None:
+            # One select() per tick; a signal writes into the wakeup pipe and
+            # interrupts the sleep immediately (flag is re-checked at loop top).
+            ready, _, _ = select.select([wakeup_r], [], [], poll_interval)
+            if ready:
+                try:
+                    os.read(wakeup_r, 512)  # drain so the fd does not stay readable
+                except OSError:
+                    pass
         else:
-            # Sleep in short intervals to react to signals faster
-            # Track time slept
-            slept = 0.0
-            # Calculate sleep step
-            step = min(0.1, poll_interval) if poll_interval > 0 else 0.1
-            # Sleep in small steps
-            while slept < poll_interval and not _terminate_requested:
-                # Sleep for step duration
-                time.sleep(step)
-                # Add step to total slept time
-                slept += step
-                # Additional stop_event check in case it was set externally without wait()
-                # Check if stop_event exists
-                if stop_event is not None:
-                    try:
-                        # Check if event is set
-                        if stop_event.is_set():
-                            # Set termination flag
-                            _terminate_requested = True
-                            # Break inner loop
-                            break
-                    except Exception:
-                        # Ignore any exception
-                        pass
-
-    # Before exit, we could try to put final events, but usually not needed.
-    # Return from function
-    return
\ No newline at end of file
+            time.sleep(poll_interval)
+
+    return
+
+
+def run_watcher(
+    out_queue,
+    poll_interval: float = 1.0,
+    include_hidden: bool = False,
+    stop_event: Optional[multiprocessing.synchronize.Event] = None,
+) -> None:
+    """
+    Start blocking watcher in current process.
+
+    Parameters:
+      out_queue: queue object (usually multiprocessing.Queue) where event
+                 dictionaries will be placed.
+      poll_interval: polling interval in seconds for the fallback mode
+                     (float, >= 0.1 recommended).
+      include_hidden: if False, ignore names starting with '.'.
+      stop_event: (optional) multiprocessing.Event - if provided, will be checked
+                  for is_set() for proper stop from another process.
+
+    Behavior:
+      - Function blocks current process and runs until:
+          * stop_event is set (if provided), or
+          * SIGTERM/SIGINT signal is sent to process, or
+          * process is forcibly terminated.
+      - No initial events are generated for already existing folders.
+      - Kernel notification (watchdog) is used when available; otherwise the
+        directory is polled every poll_interval seconds.
+    """
+    # Check if storage path exists
+    if not os.path.exists(STORAGE_PATH):
+        raise FileNotFoundError(f"Path not found: {STORAGE_PATH}")
+
+    # Set signal handlers for clean termination on SIGTERM/SIGINT.
+    # This is safe: we override signal only in watcher process.
+    signal.signal(signal.SIGTERM, _handle_terminate)
+    try:
+        signal.signal(signal.SIGINT, _handle_terminate)
+    except Exception:
+        # On some platforms (Windows) there might be SIGINT handling restrictions
+        pass
+
+    if _run_event_watcher(out_queue, include_hidden, stop_event):
+        return
+
+    _run_polling_watcher(out_queue, poll_interval, include_hidden, stop_event)
+    return
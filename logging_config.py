@@ -1,12 +1,16 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from os import makedirs
 from os.path import join as join_path
+import queue
 
 
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 LOG_DIR = "log"
 
+# listeners must outlive setup_logging(), otherwise their threads get collected
+_listeners = []
+
 
 def setup_logging():
     makedirs(LOG_DIR, exist_ok=True)
@@ -14,35 +18,53 @@ def setup_logging():
     logging.basicConfig(level=logging.ERROR)
 
     # ===== BOT LOGGER =====
+    # delay=True: файл открывается только при первой записи
     bot_handler = RotatingFileHandler(
         join_path(LOG_DIR, "bot.log"),
         maxBytes=5 * 1024 * 1024,
         backupCount=5,
-        encoding="utf-8"
+        encoding="utf-8",
+        delay=True
     )
     bot_handler.setLevel(logging.ERROR)
     bot_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 
+    # logging call from async code only enqueues the record; disk I/O happens
+    # on the QueueListener background thread, never on the event loop
+    bot_queue = queue.SimpleQueue()
+    bot_queue_handler = QueueHandler(bot_queue)
+
     bot_logger = logging.getLogger("telegram_bot")
     bot_logger.setLevel(logging.ERROR)
-    bot_logger.addHandler(bot_handler)
+    bot_logger.addHandler(bot_queue_handler)
     bot_logger.propagate = False
 
     # aiogram
-    logging.getLogger("aiogram").addHandler(bot_handler)
+    logging.getLogger("aiogram").addHandler(bot_queue_handler)
+
+    bot_listener = QueueListener(bot_queue, bot_handler)
+    bot_listener.start()
+    _listeners.append(bot_listener)
 
     # ===== SERVICE LOGGER =====
     service_handler = RotatingFileHandler(
-        join_path(LOG_DIR,"service.log"),
+        join_path(LOG_DIR, "service.log"),
         maxBytes=5 * 1024 * 1024,
         backupCount=5,
-        encoding="utf-8"
+        encoding="utf-8",
+        delay=True
     )
     service_handler.setLevel(logging.ERROR)
     service_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 
+    service_queue = queue.SimpleQueue()
+    service_queue_handler = QueueHandler(service_queue)
+
     service_logger = logging.getLogger("service")
     service_logger.setLevel(logging.ERROR)
-    service_logger.addHandler(service_handler)
+    service_logger.addHandler(service_queue_handler)
     service_logger.propagate = False
 
+    service_listener = QueueListener(service_queue, service_handler)
+    service_listener.start()
+    _listeners.append(service_listener)
@@ -5,7 +5,9 @@ from telegram_bot.bot import start_bot_wrapper
 if __name__ == "__main__":
     # multiprocessing.set_start_method("fork", force=True) # for linux
     multiprocessing.set_start_method("spawn", force=True)  # for windows
-    new_folders_queue = multiprocessing.Queue()
+    # SimpleQueue: no feeder thread and no intermediate buffer — single producer
+    # (watcher) and single consumer (bot) do not need them
+    new_folders_queue = multiprocessing.SimpleQueue()
     process_monitoring = multiprocessing.Process(target=run_watcher, args=(new_folders_queue,))
     process_bot = multiprocessing.Process(target=start_bot_wrapper, args=(new_folders_queue,))
     process_monitoring.start()
@@ -1,11 +1,12 @@
 from config import config_
 import asyncio
+import threading
 from aiogram import Bot, Dispatcher
 from aiogram.types import BotCommand
 from telegram_bot import handler_login, handler_logout, handler_search, callbacks
 from telegram_bot.middleware_ban import BanMiddleware
 from service import file_manager
-from multiprocessing.queues import Queue
+from multiprocessing.queues import SimpleQueue
 from logging_config import setup_logging
 
 
@@ -35,19 +36,37 @@ async def start_bot():
 
 
 async def process_watchdog_queue(queue):
+    # one long-lived reader thread pumps the cross-process queue into an asyncio.Queue
+    # via call_soon_threadsafe — no executor dispatch + thread hop per message, and the
+    # default executor stays free for image decoding
     loop = asyncio.get_running_loop()
+    async_queue: asyncio.Queue = asyncio.Queue()
+
+    def _pump():
+        while True:
+            try:
+                item = queue.get()
+            except (EOFError, OSError):
+                break
+            loop.call_soon_threadsafe(async_queue.put_nowait, item)
+
+    threading.Thread(target=_pump, daemon=True, name="watcher-queue-pump").start()
+
     while True:
-        # reading from a multiprocessing.Queue in a separate thread without blocking the event loop
-        file_event: dict = await loop.run_in_executor(None, queue.get)
-        if file_event.get('event', '') == "new":  # new folder
-            file_manager.add_folder(file_event['folder_name'])
-        elif file_event.get('event', '') == 'del':  # remove folder
-            file_manager.remove_folder(file_event['folder_name'])
-        else:
-            continue
+        # the watcher batches every simultaneous change into one payload: {"events": [...]};
+        # drain whatever else already queued up so a bulk upload becomes one fused pass
+        payload: dict = await async_queue.get()
+        events = list(payload.get('events', []))
+        while True:
+            try:
+                events += async_queue.get_nowait().get('events', [])
+            except asyncio.QueueEmpty:
+                break
+        if events:
+            file_manager.apply_events(events)
 
 
-async def main(new_folders_queue: Queue | None = None):
+async def main(new_folders_queue: SimpleQueue | None = None):
     # creating a task to process the Watchdog queue
     if new_folders_queue:
         asyncio.create_task(process_watchdog_queue(new_folders_queue))
@@ -56,7 +75,7 @@ async def main(new_folders_queue: Queue | None = None):
     await start_bot()
 
 
-def start_bot_wrapper(new_folders_queue: Queue | None = None):
+def start_bot_wrapper(new_folders_queue: SimpleQueue | None = None):
     # wrapper for running in a separate process at the entry point
     setup_logging()
     asyncio.run(main(new_folders_queue))
@@ -1,23 +1,37 @@
+import asyncio
 from aiogram import Bot
 from aiogram import F, Router, types
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from telegram_bot.handler_search import PaginationState, SearchState
 from telegram_bot.messages import info_message, msgs_callbacks
-from telegram_bot.keyboards import build_keyboard_with_pagination
+from telegram_bot.keyboards import build_keyboard_with_pagination, result_tuples
 from service import file_manager
 from aiogram.types import InputMediaPhoto, BufferedInputFile
 
 
 router = Router()
 
+_FOLDER_CB_PREFIX_LEN = len('folderId_')
+
 
 @router.callback_query(F.data.in_(["prev_page", "next_page"]), StateFilter(PaginationState.viewing_list))
 async def handle_pagination(callback: types.CallbackQuery, state: FSMContext):
-    # state -> {current_page: int, items: list}
+    # state -> {current_page: int, query: str, search_type: str}
     data = await state.get_data()
     current_page = data.get("current_page", 0)
-    items = data.get("items", [])
+    query = data.get("query", "")
+    search_type = data.get("search_type", "partial")
+
+    # the result set lives in file_manager's in-memory indexes, so re-fetching it
+    # per flip is an index hit — FSM no longer carries the whole list around
+    if search_type == "partial":
+        folders_list = await asyncio.to_thread(file_manager.search_folders_by_partial, query)
+    else:
+        folders_list = await asyncio.to_thread(
+            file_manager.search_folders_by_key, query=query, search_type=search_type)
+    # identity-cached against the memoized result list — a repeat flip is one probe
+    ids, names = result_tuples(folders_list)
 
     if callback.data == "prev_page":
         current_page = max(0, current_page - 1)  # do not decrement the value below 0
@@ -27,7 +41,7 @@ async def handle_pagination(callback: types.CallbackQuery, state: FSMContext):
     await state.update_data(current_page=current_page)
 
     # generate keyboard object
-    keyboard = await build_keyboard_with_pagination(items, current_page)
+    keyboard = await build_keyboard_with_pagination(ids, names, current_page)
 
     # editing the message (to avoid creating a new one)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
@@ -37,11 +51,14 @@ async def handle_pagination(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data.startswith('folderId'))
 async def handle_press_btn(callback: types.CallbackQuery, bot: Bot):
 
-    folder_id = int(callback.data.lstrip('folderId_')) # callback_data=f"folderId_{str(item['folder_id'])}"
+    # lstrip strips a *character set*, not a prefix: 'folderId_10'.lstrip('folderId_')
+    # would also eat leading digits present in the set (e.g. 'd', 'I'). Slice the
+    # known-length prefix off instead.
+    folder_id = int(callback.data[_FOLDER_CB_PREFIX_LEN:])  # callback_data=f"folderId_{str(item['folder_id'])}"
     # caption - text description for a group of images
     caption: str | None = info_message(file_manager.get_data_from_info_file(folder_id))
-    # find all image files in the folder and convert them to bytes
-    images_bytes = file_manager.prepare_images(folder_id)
+    # find all image files in the folder and convert them to bytes (decoded in a thread pool)
+    images_bytes = await file_manager.prepare_images(folder_id)
     if not images_bytes:
         #  сlose the inline button (remove the loading spinner).
         await callback.answer()
@@ -55,19 +72,18 @@ async def handle_press_btn(callback: types.CallbackQuery, bot: Bot):
 
     # if files exist
     await callback.answer()
-    media_group = []
-    # telegram API always requires a filename, even for bytes, so <filename> must be specified for BufferedInputFile
-    for i, img_bytes in enumerate(images_bytes):
-        media_group.append(
-            InputMediaPhoto(
-                media=BufferedInputFile(
-                    img_bytes,
-                    filename=f'image_{i}.jpg'
-                ),
-                caption=caption if i == 0 else None,
-                parse_mode="HTML"
-            )
+    # telegram API always requires a filename, even for bytes, so <filename> must be specified for BufferedInputFile.
+    # The wrappers are built fresh per call: they are trivial, and the expensive part
+    # (HEIC decode) is already cached in service by (path, mtime). Caching them here
+    # keyed by the raw bytes hashed megabytes per press and pinned full photos in memory.
+    media_group = [
+        InputMediaPhoto(
+            media=BufferedInputFile(img_bytes, filename=f'image_{i}.jpg'),
+            caption=caption if i == 0 else None,
+            parse_mode="HTML"
         )
+        for i, img_bytes in enumerate(images_bytes)
+    ]
     # send message with images and text
     await bot.send_media_group(
         chat_id=callback.from_user.id,
@@ -41,13 +41,13 @@ async def cmd_start(message: Message, state: FSMContext):
     user_id = message.chat.id
 
     try:
-        if users_database.cash.get(user_id, None):
-            if users_database.cash.get(user_id, 0) == 1:
-                await message.answer(text=msgs_handler_login['user_is_auth'], parse_mode="HTML")
-                return
-            elif users_database.cash.get(user_id, 0) == 2:
-                await message.answer(msgs_handler_login['was_ban'], parse_mode="HTML")
-                return
+        flag = users_database.get_flag(user_id)  # cache lookup with a SELECT ... LIMIT 1 fallback on a miss
+        if flag == 1:
+            await message.answer(text=msgs_handler_login['user_is_auth'], parse_mode="HTML")
+            return
+        elif flag == 2:
+            await message.answer(msgs_handler_login['was_ban'], parse_mode="HTML")
+            return
 
         # Patches the hole when spamming /start command during active FSM
         current_state = await state.get_state()
@@ -78,7 +78,8 @@ async def process_password(message: Message, state: FSMContext):
 
         if attempts >= MAX_ATTEMPTS_PASSPHRASE:
             await message.answer(text=msgs_handler_login['ban'], parse_mode="HTML")
-            users_database.cash[message.from_user.id] = 2  # Add to user list (user cash) with flag 3 (ban)
+            # insert() fills the cash and the banned_ids mirror itself; writing cash
+            # directly first would trip its already-cached guard and skip the DB row
             users_database.insert(user_tg_id=message.from_user.id, flag=2)  # Пишем в БД
             await state.clear()
             return
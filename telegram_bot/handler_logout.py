@@ -26,16 +26,13 @@ class LogoutState(StatesGroup):
 @router.message(Command("logout"))
 async def logout_cmd(message: Message, state: FSMContext):
     try:
-        user_id = message.from_user.id
-        if users_database.cash.get(user_id):
-            await state.set_state(LogoutState.confirm)
+        # BanMiddleware only forwards authenticated users this far
+        await state.set_state(LogoutState.confirm)
 
-            await message.answer(
-                text=msgs_handler_logout['logout_confirm'],
-                reply_markup=logout_keyboard()
-            )
-        else:
-            return
+        await message.answer(
+            text=msgs_handler_logout['logout_confirm'],
+            reply_markup=logout_keyboard()
+        )
     except Exception:
         logger.exception("handler_logout.logout_cmd")
 
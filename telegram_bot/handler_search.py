@@ -1,11 +1,11 @@
+import asyncio
 from aiogram import Router, F
 from aiogram.types import Message
 from service import file_manager
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from telegram_bot.keyboards import build_keyboard_with_pagination, build_search_keyboard
-from database.database_crud import users_database
+from telegram_bot.keyboards import build_keyboard_with_pagination, build_search_keyboard, result_tuples
 from telegram_bot.messages import msgs_handler_search
 import logging
 
@@ -26,17 +26,24 @@ class SearchState(StatesGroup):
     partial = State()
 
 
+# raw FSM state string -> search_type key; one dict probe instead of
+# split(":") allocating a list and a substring per message
+_STATE_TO_KEY = {
+    SearchState.by_contract.state: "by_contract",
+    SearchState.by_phone.state: "by_phone",
+    SearchState.by_address.state: "by_address",
+}
+
+
 @router.message(Command("search"))
 async def cmd_search(message: Message, state: FSMContext):
     try:
-        user_id = message.from_user.id
-        if not users_database.cash.get(user_id):
-            return None
+        # BanMiddleware already gates unauthenticated users — no re-check here
         await state.set_state(SearchState.choose_type)
         await message.answer(
             text=msgs_handler_search['search_method'],
             parse_mode='HTML',
-            reply_markup=await build_search_keyboard()
+            reply_markup=build_search_keyboard()
         )
     except Exception:
         logger.exception("handler_search.cmd_search")
@@ -48,47 +55,50 @@ async def search_by_key(message: Message, state: FSMContext):
         # get the current state
         current_state = await state.get_state()  # вернёт строку "SearchState:by_contract" и т.д.
 
-        if current_state is None:
-            raise
-        # extract the name of a specific state.
-        search_type = current_state.split(":")[-1]  # "by_contract", "by_phone", "partial"
+        # map the raw state string straight to the search key
+        search_type = _STATE_TO_KEY.get(current_state)
+        if search_type is None:
+            return
 
-        folders_list: list[dict] = file_manager.search_folders_by_key(query=message.text.strip(), search_type=search_type)
-        if not bool(folders_list):
+        query = message.text.strip()
+        # the search itself is synchronous — run it in a worker thread so one large
+        # query does not stall every other user sharing the event loop
+        folders_list: list[dict] = await asyncio.to_thread(
+            file_manager.search_folders_by_key, query=query, search_type=search_type)
+        if not folders_list:
             await message.answer(text=msgs_handler_search["not_found__"], parse_mode='HTML')
             return
         else:
+            ids, names = result_tuples(folders_list)
             await state.set_state(PaginationState.viewing_list)
-            await state.update_data(current_page=0, items=folders_list)  # Save in FSM)
+            # FSM keeps only the query and its type; page flips re-fetch from the
+            # in-memory indexes instead of round-tripping the whole result set
+            await state.update_data(current_page=0, query=query, search_type=search_type)  # Save in FSM)
             await message.answer(
-                text=f'{msgs_handler_search["was_found"]}{str(len(folders_list))}',
+                text=f'{msgs_handler_search["was_found"]}{len(folders_list)}',
                 parse_mode="HTML",
-                reply_markup=await build_keyboard_with_pagination(folders_list)  # Shows pagination
+                reply_markup=await build_keyboard_with_pagination(ids, names)  # Shows pagination
             )
-        await state.clear()
     except Exception:
         logger.exception("handler_search.search_by_key")
 
 
 @router.message(F.text)
 async def search_by_partial_query(message: Message, state: FSMContext):
-    print(await state.get_state())
-    user_id = message.from_user.id
-    if not users_database.cash.get(user_id):
-        return None
-
     try:
-        folders_list: list[dict] = file_manager.search_folders_by_partial(message.text.strip())
-        if not bool(folders_list):
+        query = message.text.strip()
+        folders_list: list[dict] = await asyncio.to_thread(file_manager.search_folders_by_partial, query)
+        if not folders_list:
             await message.answer(text=msgs_handler_search["not_found"], parse_mode='HTML')
             return
         else:
+            ids, names = result_tuples(folders_list)
             await state.set_state(PaginationState.viewing_list)
-            await state.update_data(current_page=0, items=folders_list)  # Save in FSM)
+            await state.update_data(current_page=0, query=query, search_type="partial")  # Save in FSM)
             await message.answer(
-                text=f'{msgs_handler_search["was_found"]}{str(len(folders_list))}',
+                text=f'{msgs_handler_search["was_found"]}{len(folders_list)}',
                 parse_mode="HTML",
-                reply_markup=await build_keyboard_with_pagination(folders_list)  # Shows pagination
+                reply_markup=await build_keyboard_with_pagination(ids, names)  # Shows pagination
             )
     except Exception:
         logger.exception("handler_search.search_by_partial_query")
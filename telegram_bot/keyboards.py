@@ -1,34 +1,93 @@
 from aiogram import types
 from aiogram.types import InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from collections import OrderedDict, deque
+from functools import lru_cache
 
 
 ITEMS_PER_PAGE = 10  # Keyboard button limit on "page"
 
+# id(result list) -> (result list, ids, names). file_manager memoizes search
+# results, so the same list object comes back on every page flip of one query —
+# its id is a stable fingerprint while the entry keeps the list referenced.
+_RESULT_TUPLES = OrderedDict()
+_RESULT_TUPLES_MAX = 64
+
+
+def result_tuples(folders_list: list) -> tuple:
+    """(ids, names) tuples for a search result, converted once per result set."""
+    key = id(folders_list)
+    entry = _RESULT_TUPLES.get(key)
+    if entry is not None and entry[0] is folders_list:
+        return entry[1], entry[2]
+    ids = tuple(item['folder_id'] for item in folders_list)
+    names = tuple(item['folder_name'] for item in folders_list)
+    _RESULT_TUPLES[key] = (folders_list, ids, names)
+    if len(_RESULT_TUPLES) > _RESULT_TUPLES_MAX:
+        _RESULT_TUPLES.popitem(last=False)
+    return ids, names
+
+
+@lru_cache(maxsize=128)
+def _labels_for(names: tuple) -> tuple:
+    # the display labels of one result set are formatted and truncated exactly once,
+    # not once per page render across every prev/next flip
+    labels = []
+    for folder_name in names:
+        button_name = f"📂 {folder_name}"
+        if len(button_name) > 62:
+            button_name = f"{button_name[:62]}..."
+        labels.append(button_name)
+    return tuple(labels)
+
+
+@lru_cache(maxsize=128)
+def _callback_data_for(ids: tuple) -> tuple:
+    # the f-string formats the int itself — no str() call needed
+    return tuple(f"folderId_{folder_id}" for folder_id in ids)
+
+
+# free-list of keyboard builders: as_markup() copies the rows out, so a builder
+# can be cleared and reused instead of re-allocated per cache-missing render
+_BUILDER_POOL = deque(maxlen=64)
 
-async def build_keyboard_with_pagination(folders_array: list[dict], page: int = 0) \
-        -> InlineKeyboardMarkup:
-    """Build inline keyboard with pagination"""
 
+def _acquire_builder() -> InlineKeyboardBuilder:
+    try:
+        return _BUILDER_POOL.pop()
+    except IndexError:
+        return InlineKeyboardBuilder()
+
+
+def _release_builder(builder: InlineKeyboardBuilder) -> None:
+    # reset goes through the builder's private buffer; if that layout ever
+    # changes, the pool just degrades to allocating fresh builders
+    markup = getattr(builder, "_markup", None)
+    if isinstance(markup, list):
+        markup.clear()
+        _BUILDER_POOL.append(builder)
+
+
+@lru_cache(maxsize=512)
+def _build_page(ids: tuple, names: tuple, page: int) -> InlineKeyboardMarkup:
+    """
+    Build one page of the pagination keyboard. The pages of a given result set are
+    immutable until the user runs a new search, so the finished markup is cached by
+    (ids, names, page) — a repeated prev/next press returns the already-built object
+    instead of re-allocating a dozen buttons.
+    """
     start_idx = page * ITEMS_PER_PAGE
     end_idx = start_idx + ITEMS_PER_PAGE
-    current_page_items = folders_array[start_idx:end_idx]
+    labels = _labels_for(names)
+    callback_data = _callback_data_for(ids)
 
-    keyboard = InlineKeyboardBuilder()
+    keyboard = _acquire_builder()
 
-    # Add buttons
-    for item in current_page_items:
-        button_name = f"📂 {item['folder_name']}"
-        if len(button_name) > 62:
-            button_name = f"{button_name[:62]}..."
-
-        keyboard.add(
-            InlineKeyboardButton(
-                text=button_name,
-                callback_data=f"folderId_{str(item['folder_id'])}"
-            )
-        )
+    # Add buttons — zip over the page slices: C-level iteration, no index arithmetic
+    # per row (slicing clamps past-the-end itself)
+    for text, cb in zip(labels[start_idx:end_idx], callback_data[start_idx:end_idx]):
+        keyboard.button(text=text, callback_data=cb)
 
     navigation_buttons = []
 
@@ -39,7 +98,7 @@ async def build_keyboard_with_pagination(folders_array: list[dict], page: int =
         )
 
     # Button "Next" (if current page not last)
-    if end_idx < len(folders_array):
+    if end_idx < len(ids):
         navigation_buttons.append(
             types.InlineKeyboardButton(text="Далее ➡️", callback_data="next_page")
         )
@@ -48,23 +107,18 @@ async def build_keyboard_with_pagination(folders_array: list[dict], page: int =
     keyboard.adjust(1)  # One element per row
     if navigation_buttons:
         keyboard.row(*navigation_buttons)
-    return keyboard.as_markup()
-
+    markup = keyboard.as_markup()
+    _release_builder(keyboard)
+    return markup
 
-def logout_keyboard():
-    # build logout keyboard
-    logout_kb = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="Да"), KeyboardButton(text="Нет")]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
-    return logout_kb
 
+async def build_keyboard_with_pagination(ids: tuple, names: tuple, page: int = 0) \
+        -> InlineKeyboardMarkup:
+    """Build inline keyboard with pagination from parallel (ids, names) tuples"""
+    return _build_page(ids, names, page)
 
-async def build_search_keyboard():
 
+def _build_search_kb() -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
 
     kb.button(text="📄 По номеру договора", callback_data="search:contract")
@@ -75,3 +129,22 @@ async def build_search_keyboard():
     kb.adjust(1)  # one button per line
     return kb.as_markup()
 
+
+# both keyboards are immutable — build them once at import instead of per request
+LOGOUT_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="Да"), KeyboardButton(text="Нет")]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+SEARCH_KB = _build_search_kb()
+
+
+def logout_keyboard():
+    return LOGOUT_KB
+
+
+def build_search_keyboard():
+    return SEARCH_KB
+
@@ -19,7 +19,24 @@ class BanMiddleware(BaseMiddleware):
 
         # Get
         user = data.get("event_from_user")
-        if users_database.cash.get(user.id, None) and users_database.cash[user.id] == 2:
-            return
+        # one set probe instead of two dict lookups plus an equality compare
+        if user and user.id in users_database.banned_ids:
+            return await self.__drop(event)
+        if user is None or user.id not in users_database.logged_in_ids:
+            # single auth gate: unknown users only get through to /start (to begin
+            # authentication) or while inside an active FSM flow (the password
+            # prompt); everything else stops here instead of in every handler
+            if data.get("raw_state") is None:
+                message = getattr(event, "message", None)
+                if message is None or not message.text or not message.text.startswith("/start"):
+                    return await self.__drop(event)
         # If the user isn't banned, forward the message to the handler
-        return await handler(event, data)
\ No newline at end of file
+        return await handler(event, data)
+
+    @staticmethod
+    async def __drop(event: TelegramObject) -> None:
+        # a swallowed callback_query (stale inline keyboard after logout/restart)
+        # would leave the client's loading spinner hanging — close it first
+        callback = getattr(event, "callback_query", None)
+        if callback is not None:
+            await callback.answer()
\ No newline at end of file